@@ -1,8 +1,23 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify, render_template_string, send_from_directory, g, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
+import click
+import functools
+import gzip
+import hashlib
 import json
+import mimetypes
 import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; only gzip variants are built without it
+    brotli = None
 
 app = Flask(__name__, static_folder='./static', static_url_path='/')
 CORS(app)  # Enable CORS for all domains on all routes
@@ -15,6 +30,26 @@ JOINED_ROOMS_FILE = os.path.join(DATA_DIR, 'joined_rooms.json')
 # Create data directory if it doesn't exist
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Guards chat_rooms, joined_rooms and next_id while they are changed and saved
+data_lock = threading.Lock()
+
+# Output of the static asset build (see build_static_assets)
+DIST_DIR = os.path.join(os.path.dirname(__file__), 'dist')
+ASSETS_URL_PATH = '/assets'
+
+# Static files that get fingerprinted and referenced from index.html
+FINGERPRINTED_ASSETS = ['js/app.js', 'css/styles.css', 'img/favicon.svg']
+
+# Precompressed variants in order of preference: (Accept-Encoding token, file suffix)
+COMPRESSED_VARIANTS = [('br', '.br'), ('gzip', '.gz')]
+
+# Fingerprinted files never change, so browsers may cache them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Opt-in traffic capture: set TRAFFIC_CAPTURE_FILE to record requests for replay.py
+app.config['TRAFFIC_CAPTURE_FILE'] = os.environ.get('TRAFFIC_CAPTURE_FILE')
+capture_lock = threading.Lock()
+
 # Load or initialize chat rooms
 def load_rooms():
     try:
@@ -37,13 +72,29 @@ def load_rooms():
             {'id': 2, 'name': 'Tech Talk', 'owner': 'User1', 'createdAt': datetime.now().isoformat()}
         ]
 
-# Save chat rooms to file
+# Write JSON to a temporary file and swap it in, so a failed write never truncates the original
+def write_json_file(path, data):
+    # A unique temp file per call keeps concurrent saves from writing into each other
+    fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        # mkstemp creates files readable only by their owner
+        os.chmod(temp_file, 0o644)
+        os.replace(temp_file, path)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+# Save chat rooms to file; returns False if the save failed
 def save_rooms(rooms):
     try:
-        with open(ROOMS_FILE, 'w') as f:
-            json.dump(rooms, f)
+        write_json_file(ROOMS_FILE, rooms)
+        return True
     except Exception as e:
         print(f"Error saving rooms: {e}")
+        return False
 
 # Load or initialize joined rooms
 def load_joined_rooms():
@@ -60,19 +111,410 @@ def load_joined_rooms():
         print(f"Error loading joined rooms: {e}")
         return {}
 
-# Save joined rooms to file
+# Save joined rooms to file; returns False if the save failed
 def save_joined_rooms(joined):
     try:
-        with open(JOINED_ROOMS_FILE, 'w') as f:
-            json.dump(joined, f)
+        write_json_file(JOINED_ROOMS_FILE, joined)
+        return True
     except Exception as e:
         print(f"Error saving joined rooms: {e}")
+        return False
+
+# Write gzip and (when available) brotli variants next to a built file
+def write_compressed_variants(path, data):
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data))
+
+# Read a build manifest: {"assets": {original: hashed}, "previous": [hashed, ...]}
+def read_manifest_file(manifest_path):
+    if not os.path.exists(manifest_path):
+        return {'assets': {}, 'previous': []}
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+# Fingerprint static assets, rewrite index.html to use them and precompress everything.
+# Each build goes into its own directory under DIST_DIR-builds and DIST_DIR is then switched
+# to it with an atomic symlink swap, so a running server never sees a half-written build.
+def build_static_assets():
+    static_dir = app.static_folder
+    builds_dir = DIST_DIR + '-builds'
+    os.makedirs(builds_dir, exist_ok=True)
+    build_dir = tempfile.mkdtemp(dir=builds_dir, prefix='build-')
+
+    manifest = {}
+    for asset in FINGERPRINTED_ASSETS:
+        with open(os.path.join(static_dir, asset), 'rb') as f:
+            data = f.read()
+
+        base, ext = os.path.splitext(asset)
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed = f"{base}.{digest}{ext}"
+
+        target = os.path.join(build_dir, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        write_compressed_variants(target, data)
+        manifest[asset] = hashed
+
+    # Keep the previous build's hashed files so pages loaded before this build still resolve them
+    previous_manifest = read_manifest_file(os.path.join(DIST_DIR, 'manifest.json'))
+    previous = [hashed for hashed in previous_manifest['assets'].values() if hashed not in manifest.values()]
+    for hashed in previous:
+        for suffix in ['', '.gz', '.br']:
+            source = os.path.join(DIST_DIR, hashed + suffix)
+            if os.path.exists(source):
+                target = os.path.join(build_dir, hashed + suffix)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(source, target)
+
+    with open(os.path.join(static_dir, 'index.html'), 'r') as f:
+        html = f.read()
+
+    # Point every href/src reference ("js/app.js", "./js/app.js", "/js/app.js") at the hashed file
+    for asset, hashed in manifest.items():
+        pattern = r'(href|src)="(?:\./|/)?' + re.escape(asset) + '"'
+        html = re.sub(pattern, lambda m, h=hashed: f'{m.group(1)}="{ASSETS_URL_PATH}/{h}"', html)
+
+    index_path = os.path.join(build_dir, 'index.html')
+    with open(index_path, 'w') as f:
+        f.write(html)
+    write_compressed_variants(index_path, html.encode('utf-8'))
+
+    with open(os.path.join(build_dir, 'manifest.json'), 'w') as f:
+        json.dump({'assets': manifest, 'previous': previous}, f, indent=2)
+
+    # A dist directory from before builds were swapped in cannot be replaced by a symlink
+    if os.path.isdir(DIST_DIR) and not os.path.islink(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+
+    link_path = build_dir + '.link'
+    os.symlink(os.path.relpath(build_dir, os.path.dirname(DIST_DIR)), link_path)
+    os.replace(link_path, DIST_DIR)
+
+    # Everything the new build still needs was copied into it
+    for name in os.listdir(builds_dir):
+        path = os.path.join(builds_dir, name)
+        if path != build_dir:
+            shutil.rmtree(path, ignore_errors=True)
+
+    return manifest
+
+# Hashed file names from a build's manifest; cached until the manifest is rewritten
+@functools.lru_cache(maxsize=4)
+def read_asset_manifest(manifest_path, mtime):
+    manifest = read_manifest_file(manifest_path)
+    return frozenset(list(manifest['assets'].values()) + manifest['previous'])
+
+# Only fingerprinted files may be served as immutable assets
+def is_fingerprinted_asset(filename):
+    manifest_path = os.path.join(DIST_DIR, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return False
+    # Key the cache on the resolved path, since DIST_DIR is a symlink to the current build
+    manifest_path = os.path.realpath(manifest_path)
+    return filename in read_asset_manifest(manifest_path, os.path.getmtime(manifest_path))
+
+# Serve a built file, preferring a precompressed variant the client accepts
+def send_built_file(filename, max_age=None):
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    encoding = None
+    for token, suffix in COMPRESSED_VARIANTS:
+        if request.accept_encodings[token] and os.path.exists(os.path.join(DIST_DIR, filename + suffix)):
+            encoding = token
+            filename += suffix
+            break
+
+    response = send_from_directory(DIST_DIR, filename, mimetype=mimetype, max_age=max_age)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.cli.command('build-static')
+def build_static_command():
+    """Fingerprint and precompress static assets into the dist directory."""
+    manifest = build_static_assets()
+    for asset, hashed in manifest.items():
+        print(f"{asset} -> {hashed}")
+    if brotli is None:
+        print("Brotli is not installed; only gzip variants were written")
+
+@app.before_request
+def start_capture_timer():
+    if app.config.get('TRAFFIC_CAPTURE_FILE'):
+        # Wall-clock arrival time drives replay spacing; perf_counter measures processing time
+        g.capture_ts = time.time()
+        g.capture_start = time.perf_counter()
+
+# Append one line per request to the capture file so replay.py can reproduce the traffic
+@app.after_request
+def capture_request(response):
+    capture_file = app.config.get('TRAFFIC_CAPTURE_FILE')
+    if not capture_file or 'capture_start' not in g:
+        return response
+
+    record = {
+        'ts': round(g.capture_ts, 3),
+        'method': request.method,
+        'path': request.path,
+        'route': request.url_rule.rule if request.url_rule else None,
+        'args': list(request.args.items(multi=True)),
+        'form': list(request.form.items(multi=True)),
+        'status': response.status_code,
+        'ms': round((time.perf_counter() - g.capture_start) * 1000, 2)
+    }
+
+    try:
+        with capture_lock, open(capture_file, 'a') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+    except Exception as e:
+        print(f"Error capturing request: {e}")
+    return response
 
 # Load initial data
 chat_rooms = load_rooms()
 next_id = max([room['id'] for room in chat_rooms]) + 1 if chat_rooms else 1
 joined_rooms = load_joined_rooms()
 
+# Number of imported records applied between saves and checkpoints
+IMPORT_BATCH_SIZE = 1000
+
+# Yield rooms and then memberships as NDJSON lines, one record at a time
+def export_records():
+    for room in list(chat_rooms):
+        yield json.dumps({'type': 'room', **room}) + '\n'
+    for username, room_ids in list(joined_rooms.items()):
+        for room_id in list(room_ids):
+            yield json.dumps({'type': 'membership', 'username': username, 'roomId': room_id}) + '\n'
+
+# Client-chosen ids for resumable imports over HTTP; each maps to a checkpoint file
+IMPORT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+active_import_ids = set()
+active_imports_lock = threading.Lock()
+
+# A checkpoint is a small JSON file with the last saved line, a hash of every line up to it
+# and the size of its append-only id map (checkpoint_file + '.ids', one [old, new] per line)
+def load_import_checkpoint(checkpoint_file):
+    ids_file = checkpoint_file + '.ids'
+    if not os.path.exists(checkpoint_file):
+        # Entries left by an import that never saved its first batch
+        if os.path.exists(ids_file):
+            os.remove(ids_file)
+        return 0, None, {}
+
+    with open(checkpoint_file, 'r') as f:
+        checkpoint = json.load(f)
+
+    id_map = {}
+    if checkpoint['idMapBytes']:
+        if not os.path.exists(ids_file):
+            raise ValueError(f"Import checkpoint {checkpoint_file} is missing its id map")
+        # Drop entries appended by a batch that failed before its checkpoint was written
+        os.truncate(ids_file, checkpoint['idMapBytes'])
+        with open(ids_file, 'r') as f:
+            for line in f:
+                old_id, new_id = json.loads(line)
+                id_map[old_id] = new_id
+    return checkpoint['line'], checkpoint['sha256'], id_map
+
+def remove_import_checkpoint(checkpoint_file):
+    for path in [checkpoint_file, checkpoint_file + '.ids']:
+        if os.path.exists(path):
+            os.remove(path)
+
+# Parse and type-check one NDJSON line; ids are resolved later when the batch is applied
+def parse_import_record(line):
+    record = json.loads(line.decode('utf-8') if isinstance(line, bytes) else line)
+    if not isinstance(record, dict):
+        raise ValueError("record is not a JSON object")
+
+    record_type = record.get('type')
+    if record_type == 'room':
+        room = {
+            'id': record.get('id'),
+            'name': record.get('name'),
+            'owner': record.get('owner', 'User1'),
+            'createdAt': record.get('createdAt', datetime.now().isoformat())
+        }
+        if not isinstance(room['id'], int) or isinstance(room['id'], bool):
+            raise ValueError("room id must be an integer")
+        if not isinstance(room['name'], str) or not room['name']:
+            raise ValueError("room name must be a non-empty string")
+        for field in ['owner', 'createdAt']:
+            if not isinstance(room[field], str):
+                raise ValueError(f"room {field} must be a string")
+        return {'type': 'room', **room}
+
+    if record_type == 'membership':
+        username = record.get('username')
+        room_id = record.get('roomId')
+        if not isinstance(username, str) or not username:
+            raise ValueError("membership username must be a non-empty string")
+        if not isinstance(room_id, int) or isinstance(room_id, bool):
+            raise ValueError("membership roomId must be an integer")
+        return {'type': 'membership', 'username': username, 'roomId': room_id}
+
+    raise ValueError(f"unknown record type {record_type!r}")
+
+# Apply one batch and save it; on failure the batch is rolled back so later saves cannot persist it
+def apply_import_batch(batch, skipped, id_map, summary, checkpoint_file, line_number, sha256):
+    global next_id
+
+    with data_lock:
+        rooms_before = len(chat_rooms)
+        next_id_before = next_id
+        added_old_ids = []
+        added_memberships = []
+        new_users = []
+        counts = {'rooms': 0, 'memberships': 0, 'skipped': skipped}
+
+        # Rebuilt per batch because users may delete rooms between batches
+        room_ids = {room['id'] for room in chat_rooms}
+
+        for record in batch:
+            if record['type'] == 'room':
+                if record['id'] in id_map:
+                    print(f"Skipping imported room: duplicate room id {record['id']}")
+                    counts['skipped'] += 1
+                    continue
+                chat_rooms.append({
+                    'id': next_id,
+                    'name': record['name'],
+                    'owner': record['owner'],
+                    'createdAt': record['createdAt']
+                })
+                room_ids.add(next_id)
+                id_map[record['id']] = next_id
+                added_old_ids.append(record['id'])
+                next_id += 1
+                counts['rooms'] += 1
+            else:
+                room_id = id_map.get(record['roomId'])
+                if room_id not in room_ids:
+                    print(f"Skipping imported membership: unknown room {record['roomId']}")
+                    counts['skipped'] += 1
+                    continue
+                if record['username'] not in joined_rooms:
+                    joined_rooms[record['username']] = []
+                    new_users.append(record['username'])
+                if room_id not in joined_rooms[record['username']]:
+                    joined_rooms[record['username']].append(room_id)
+                    added_memberships.append((record['username'], room_id))
+                counts['memberships'] += 1
+
+        # The checkpoint is written last, so it only ever moves past lines that are on disk
+        try:
+            id_map_bytes = 0
+            if checkpoint_file:
+                with open(checkpoint_file + '.ids', 'a') as f:
+                    for old_id in added_old_ids:
+                        f.write(json.dumps([old_id, id_map[old_id]]) + '\n')
+                    id_map_bytes = f.tell()
+            if not save_rooms(chat_rooms) or not save_joined_rooms(joined_rooms):
+                raise OSError(f"Could not save imported data after line {line_number}")
+            if checkpoint_file:
+                write_json_file(checkpoint_file, {'line': line_number, 'sha256': sha256, 'idMapBytes': id_map_bytes})
+        except OSError:
+            del chat_rooms[rooms_before:]
+            next_id = next_id_before
+            for username, room_id in added_memberships:
+                joined_rooms[username].remove(room_id)
+            for username in new_users:
+                if not joined_rooms[username]:
+                    del joined_rooms[username]
+            for old_id in added_old_ids:
+                del id_map[old_id]
+            # Best effort to put the files back to the last saved batch
+            save_rooms(chat_rooms)
+            save_joined_rooms(joined_rooms)
+            raise
+
+    for key, value in counts.items():
+        summary[key] += value
+    summary['line'] = line_number
+
+# Import NDJSON records in batches. With a checkpoint file an interrupted import resumes after the
+# last saved batch; summary, if given, is filled in place so callers can report partial progress.
+def import_records(lines, batch_size=IMPORT_BATCH_SIZE, checkpoint_file=None, summary=None):
+    # Every imported room gets a fresh id from next_id; id_map maps exported ids to the new ones
+    start_line, expected_sha256, id_map = 0, None, {}
+    if checkpoint_file:
+        start_line, expected_sha256, id_map = load_import_checkpoint(checkpoint_file)
+
+    if summary is None:
+        summary = {}
+    summary.update({'rooms': 0, 'memberships': 0, 'skipped': 0, 'line': start_line})
+
+    # Hash every line so a resume can verify it is reading the same input as before
+    prefix_hash = hashlib.sha256()
+    batch = []
+    skipped = 0
+    line_number = 0
+
+    for line_number, line in enumerate(lines, start=1):
+        prefix_hash.update(line.encode('utf-8') if isinstance(line, str) else line)
+        if line_number <= start_line:
+            if line_number == start_line and prefix_hash.hexdigest() != expected_sha256:
+                raise ValueError("Import input does not match its checkpoint")
+            continue
+        if not line.strip():
+            continue
+
+        try:
+            batch.append(parse_import_record(line))
+        except ValueError as e:
+            print(f"Skipping import line {line_number}: {e}")
+            skipped += 1
+
+        if len(batch) + skipped >= batch_size:
+            apply_import_batch(batch, skipped, id_map, summary, checkpoint_file, line_number, prefix_hash.hexdigest())
+            batch = []
+            skipped = 0
+
+    if line_number < start_line:
+        raise ValueError("Import input does not match its checkpoint")
+
+    apply_import_batch(batch, skipped, id_map, summary, checkpoint_file, line_number, prefix_hash.hexdigest())
+    if checkpoint_file:
+        remove_import_checkpoint(checkpoint_file)
+    return summary
+
+@app.cli.command('export-data')
+@click.argument('path')
+def export_data_command(path):
+    """Write all rooms and memberships to PATH as NDJSON."""
+    with open(path, 'w') as f:
+        for line in export_records():
+            f.write(line)
+
+@app.cli.command('import-data')
+@click.argument('path')
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True, help='Records applied between saves.')
+@click.option('--resume/--no-resume', default=True, show_default=True,
+              help='Continue from the checkpoint left by an interrupted import of the same file.')
+def import_data_command(path, batch_size, resume):
+    """Import rooms and memberships from an NDJSON file at PATH.
+
+    Stop the server first: it keeps its own copy of the data in memory and
+    overwrites the imported rooms on its next save.
+    """
+    checkpoint_file = path + '.checkpoint'
+    if not resume:
+        remove_import_checkpoint(checkpoint_file)
+
+    # Lines are decoded one at a time so a bad byte sequence only skips its own line
+    try:
+        with open(path, 'rb') as f:
+            summary = import_records(f, batch_size=batch_size, checkpoint_file=checkpoint_file)
+    except (OSError, ValueError) as e:
+        raise click.ClickException(f"{e}. Re-run to resume from the last saved batch, or pass --no-resume to start over.")
+    print(f"Imported {summary['rooms']} rooms and {summary['memberships']} memberships, skipped {summary['skipped']} lines")
+
 # Template for rooms list HTML
 ROOMS_LIST_TEMPLATE = '''
 <div class="rooms-container">
@@ -167,8 +609,26 @@ EDIT_ROOM_FORM = '''
 
 @app.route('/')
 def index():
-    # Serve the main index.html file
-    return app.send_static_file('index.html')
+    # Fall back to the unbuilt index.html when build-static hasn't been run
+    if not os.path.exists(os.path.join(DIST_DIR, 'index.html')):
+        return app.send_static_file('index.html')
+
+    # Serve the built index.html; browsers revalidate it on every visit via its ETag
+    response = send_built_file('index.html')
+    response.cache_control.no_cache = True
+    return response
+
+@app.route(f'{ASSETS_URL_PATH}/<path:filename>')
+def serve_asset(filename):
+    # index.html, manifest.json and stale hashes must never be cached as immutable
+    if not is_fingerprinted_asset(filename):
+        return "Asset not found", 404
+
+    # Fingerprinted assets change name whenever their content changes
+    response = send_built_file(filename, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 @app.route('/api/rooms', methods=['GET'])
 def get_rooms():
@@ -203,20 +663,21 @@ def create_room():
     if not room_name:
         return "Room name is required", 400
     
-    # Create new room
-    new_room = {
-        'id': next_id,
-        'name': room_name,
-        'owner': username,
-        'createdAt': datetime.now().isoformat()
-    }
+    with data_lock:
+        # Create new room
+        new_room = {
+            'id': next_id,
+            'name': room_name,
+            'owner': username,
+            'createdAt': datetime.now().isoformat()
+        }
     
-    # Add to rooms list
-    chat_rooms.append(new_room)
-    next_id += 1
+        # Add to rooms list
+        chat_rooms.append(new_room)
+        next_id += 1
     
-    # Save to file
-    save_rooms(chat_rooms)
+        # Save to file
+        save_rooms(chat_rooms)
     
     # Get list of rooms this user has joined
     user_joined_rooms = joined_rooms.get(username, [])
@@ -247,17 +708,18 @@ def update_room(room_id):
     if not room_name:
         return "Room name is required", 400
     
-    # Find room by ID
-    room = next((r for r in chat_rooms if r['id'] == room_id), None)
+    with data_lock:
+        # Find room by ID
+        room = next((r for r in chat_rooms if r['id'] == room_id), None)
     
-    if not room:
-        return "Room not found", 404
+        if not room:
+            return "Room not found", 404
     
-    # Update room name
-    room['name'] = room_name
+        # Update room name
+        room['name'] = room_name
     
-    # Save to file
-    save_rooms(chat_rooms)
+        # Save to file
+        save_rooms(chat_rooms)
     
     # Get list of rooms this user has joined
     user_joined_rooms = joined_rooms.get(username, [])
@@ -272,21 +734,22 @@ def delete_room(room_id):
     # Get username (in a real app would be from authentication)
     username = request.args.get('username', 'User1')
     
-    # Find room by ID
-    room = next((r for r in chat_rooms if r['id'] == room_id), None)
+    with data_lock:
+        # Find room by ID
+        room = next((r for r in chat_rooms if r['id'] == room_id), None)
     
-    if not room:
-        return "Room not found", 404
+        if not room:
+            return "Room not found", 404
     
-    # Remove room from list
-    chat_rooms = [r for r in chat_rooms if r['id'] != room_id]
-    save_rooms(chat_rooms)
+        # Remove room from list
+        chat_rooms = [r for r in chat_rooms if r['id'] != room_id]
+        save_rooms(chat_rooms)
     
-    # If any users have joined this room, remove it from their joined_rooms list
-    for user, rooms in joined_rooms.items():
-        if room_id in rooms:
-            joined_rooms[user] = [r for r in rooms if r != room_id]
-    save_joined_rooms(joined_rooms)
+        # If any users have joined this room, remove it from their joined_rooms list
+        for user, rooms in joined_rooms.items():
+            if room_id in rooms:
+                joined_rooms[user] = [r for r in rooms if r != room_id]
+        save_joined_rooms(joined_rooms)
     
     # Get list of rooms this user has joined
     user_joined_rooms = joined_rooms.get(username, [])
@@ -301,19 +764,20 @@ def join_room(room_id):
     # Get username from request
     username = request.args.get('username', 'User1')
     
-    # Find room by ID
-    room = next((r for r in chat_rooms if r['id'] == room_id), None)
+    with data_lock:
+        # Find room by ID
+        room = next((r for r in chat_rooms if r['id'] == room_id), None)
     
-    if not room:
-        return "Room not found", 404
+        if not room:
+            return "Room not found", 404
     
-    # Add room to user's joined rooms
-    if username not in joined_rooms:
-        joined_rooms[username] = []
+        # Add room to user's joined rooms
+        if username not in joined_rooms:
+            joined_rooms[username] = []
     
-    if room_id not in joined_rooms[username]:
-        joined_rooms[username].append(room_id)
-        save_joined_rooms(joined_rooms)
+        if room_id not in joined_rooms[username]:
+            joined_rooms[username].append(room_id)
+            save_joined_rooms(joined_rooms)
     
     # Refresh the rooms list to show updated UI
     return render_template_string(ROOMS_LIST_TEMPLATE, rooms=chat_rooms, username=username, joined_rooms=joined_rooms.get(username, []))
@@ -325,19 +789,64 @@ def leave_room(room_id):
     # Get username from request
     username = request.args.get('username', 'User1')
     
-    # Find room by ID
-    room = next((r for r in chat_rooms if r['id'] == room_id), None)
+    with data_lock:
+        # Find room by ID
+        room = next((r for r in chat_rooms if r['id'] == room_id), None)
     
-    if not room:
-        return "Room not found", 404
+        if not room:
+            return "Room not found", 404
     
-    # Remove room from user's joined rooms
-    if username in joined_rooms and room_id in joined_rooms[username]:
-        joined_rooms[username].remove(room_id)
-        save_joined_rooms(joined_rooms)
+        # Remove room from user's joined rooms
+        if username in joined_rooms and room_id in joined_rooms[username]:
+            joined_rooms[username].remove(room_id)
+            save_joined_rooms(joined_rooms)
     
     # Refresh the rooms list to show updated UI
     return render_template_string(ROOMS_LIST_TEMPLATE, rooms=chat_rooms, username=username, joined_rooms=joined_rooms.get(username, []))
 
+@app.route('/api/export', methods=['GET'])
+def export_data():
+    # Stream the export so large datasets are never serialized in one piece
+    response = Response(stream_with_context(export_records()), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = 'attachment; filename=chatroom-export.ndjson'
+    return response
+
+@app.route('/api/import', methods=['POST'])
+def import_data():
+    # With an importId the import is checkpointed and posting the same body again resumes it
+    import_id = request.args.get('importId')
+    checkpoint_file = None
+    if import_id is not None:
+        if not IMPORT_ID_PATTERN.match(import_id):
+            return "Invalid importId", 400
+        imports_dir = os.path.join(DATA_DIR, 'imports')
+        os.makedirs(imports_dir, exist_ok=True)
+        checkpoint_file = os.path.join(imports_dir, import_id + '.checkpoint')
+
+        with active_imports_lock:
+            if import_id in active_import_ids:
+                return "Import is already running", 409
+            active_import_ids.add(import_id)
+
+    summary = {}
+    try:
+        if checkpoint_file and request.args.get('resume', 'true') == 'false':
+            remove_import_checkpoint(checkpoint_file)
+        # Read the NDJSON request body line by line instead of buffering it
+        import_records(request.stream, batch_size=request.args.get('batchSize', IMPORT_BATCH_SIZE, type=int),
+                       checkpoint_file=checkpoint_file, summary=summary)
+    except ValueError as e:
+        return str(e), 409
+    except OSError as e:
+        print(f"Error importing data: {e}")
+        # Everything up to summary['line'] is saved; the failed batch was rolled back
+        return jsonify({'error': 'Could not save imported data', 'importId': import_id, **summary}), 500
+    finally:
+        if import_id is not None:
+            with active_imports_lock:
+                active_import_ids.discard(import_id)
+
+    return jsonify({'importId': import_id, **summary})
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
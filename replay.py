@@ -0,0 +1,167 @@
+"""
+Replay captured traffic against a running chat room server.
+
+Start the server with TRAFFIC_CAPTURE_FILE set to record a trace, then replay it:
+
+    python replay.py trace.ndjson --url http://localhost:5000 --speed 10 --concurrency 8
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+import argparse
+import json
+import threading
+import time
+
+# Read captured requests one line at a time, skipping blank or truncated lines
+def load_trace(path):
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                print(f"Skipping malformed trace line: {line[:80]}")
+
+# Return a send function that issues a captured request over HTTP and returns the status code
+def http_sender(base_url, timeout=30):
+    base_url = base_url.rstrip('/')
+
+    def send(record):
+        url = base_url + record['path']
+        if record.get('args'):
+            url += '?' + urlencode([tuple(pair) for pair in record['args']])
+
+        data = None
+        headers = {}
+        if record.get('form'):
+            data = urlencode([tuple(pair) for pair in record['form']]).encode('utf-8')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        req = Request(url, data=data, headers=headers, method=record['method'])
+        try:
+            with urlopen(req, timeout=timeout) as response:
+                response.read()
+                return response.status
+        except HTTPError as e:
+            return e.code
+
+    return send
+
+# Nearest-rank percentile of an already sorted list
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, int(round(pct / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+# Replay records with their original spacing divided by speed (0 means as fast as possible)
+def replay(records, send, speed=1.0, concurrency=4):
+    results = {}
+    results_lock = threading.Lock()
+
+    # Bound submissions to the workers available so a long trace is never queued up in memory
+    in_flight = threading.BoundedSemaphore(concurrency)
+
+    # Latency is measured from the scheduled send time, so time spent waiting for a free
+    # worker counts against the server instead of disappearing from the report
+    def run(record, scheduled):
+        try:
+            record_result(record, scheduled)
+        finally:
+            in_flight.release()
+
+    def record_result(record, scheduled):
+        route = f"{record['method']} {record.get('route') or record['path']}"
+        lag = (time.perf_counter() - scheduled) * 1000
+        status = None
+        try:
+            status = send(record)
+            error = status >= 500
+        except Exception as e:
+            print(f"Error replaying {record['method']} {record['path']}: {e}")
+            error = True
+        latency = (time.perf_counter() - scheduled) * 1000
+
+        # A different status usually means the target's data differs from the captured server's
+        mismatch = status is not None and record.get('status') is not None and status != record['status']
+
+        with results_lock:
+            stats = results.setdefault(route, {'latencies': [], 'lags': [], 'errors': 0, 'mismatches': 0})
+            stats['latencies'].append(latency)
+            stats['lags'].append(lag)
+            stats['errors'] += int(error)
+            stats['mismatches'] += int(mismatch)
+
+    first_ts = None
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for record in records:
+            if first_ts is None:
+                first_ts = record['ts']
+
+            # Waiting for a free slot counts as lag when replaying on a schedule; at full
+            # speed a request is simply due whenever a slot frees up
+            if speed > 0:
+                scheduled = started + (record['ts'] - first_ts) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                in_flight.acquire()
+            else:
+                in_flight.acquire()
+                scheduled = time.perf_counter()
+
+            executor.submit(run, record, scheduled)
+
+    report = {}
+    for route, stats in results.items():
+        latencies = sorted(stats['latencies'])
+        report[route] = {
+            'count': len(latencies),
+            'errors': stats['errors'],
+            'mismatches': stats['mismatches'],
+            'mean_ms': sum(latencies) / len(latencies),
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'max_ms': latencies[-1],
+            'max_lag_ms': max(stats['lags'])
+        }
+    return report
+
+def print_report(report):
+    print(f"{'route':<45} {'count':>7} {'errors':>7} {'mismatch':>9} "
+          f"{'mean':>9} {'p50':>9} {'p95':>9} {'max':>9} {'max lag':>9}")
+    for route in sorted(report):
+        stats = report[route]
+        print(f"{route:<45} {stats['count']:>7} {stats['errors']:>7} {stats['mismatches']:>9} "
+              f"{stats['mean_ms']:>9.2f} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['max_ms']:>9.2f} "
+              f"{stats['max_lag_ms']:>9.2f}")
+
+    if report:
+        # Lag is how long requests waited past their scheduled send time for a free worker
+        max_lag = max(stats['max_lag_ms'] for stats in report.values())
+        print(f"Replay fell behind schedule by up to {max_lag:.2f} ms")
+
+        mismatches = sum(stats['mismatches'] for stats in report.values())
+        if mismatches:
+            print(f"{mismatches} responses had a different status than when captured; "
+                  f"the target server's data probably differs from the captured one")
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a captured traffic trace against the chat room server.')
+    parser.add_argument('trace', help='Trace file written by the server with TRAFFIC_CAPTURE_FILE set')
+    parser.add_argument('--url', default='http://localhost:5000', help='Base URL of the server to drive')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Replay speed multiplier, e.g. 10 for 10x; 0 sends requests as fast as possible')
+    parser.add_argument('--concurrency', type=int, default=4, help='Maximum number of requests in flight')
+    args = parser.parse_args()
+
+    report = replay(load_trace(args.trace), http_sender(args.url), speed=args.speed, concurrency=args.concurrency)
+    print_report(report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import pytest
+
+# Add the parent directory to the path so we can import main.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main
+
+def read_ndjson(data):
+    return [json.loads(line) for line in data.splitlines() if line.strip()]
+
+def import_counts(result):
+    return {key: result[key] for key in ('rooms', 'memberships', 'skipped')}
+
+def test_export(client):
+    """Test exporting rooms and memberships as NDJSON."""
+    response = client.get('/api/export')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    
+    records = read_ndjson(response.get_data(as_text=True))
+    rooms = [r for r in records if r['type'] == 'room']
+    memberships = [r for r in records if r['type'] == 'membership']
+    
+    assert [r['name'] for r in rooms] == ['Test Room 1', 'Test Room 2']
+    assert memberships == [{'type': 'membership', 'username': 'TestUser', 'roomId': 1}]
+
+def test_import_remaps_ids(client):
+    """Test that imported rooms get new ids after the existing ones and memberships follow them."""
+    lines = [
+        json.dumps({'type': 'room', 'id': 1, 'name': 'Imported A', 'owner': 'Alice'}),
+        json.dumps({'type': 'room', 'id': 5, 'name': 'Imported B', 'owner': 'Bob'}),
+        json.dumps({'type': 'membership', 'username': 'Alice', 'roomId': 5}),
+        json.dumps({'type': 'membership', 'username': 'TestUser', 'roomId': 1})
+    ]
+    response = client.post('/api/import', data='\n'.join(lines), content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert import_counts(response.get_json()) == {'rooms': 2, 'memberships': 2, 'skipped': 0}
+    
+    # Existing ids are 1 and 2, so imported rooms get the next free ids in order
+    names = {room['id']: room['name'] for room in main.chat_rooms}
+    assert names[3] == 'Imported A'
+    assert names[4] == 'Imported B'
+    assert main.next_id == 5
+    assert main.joined_rooms['Alice'] == [4]
+    assert main.joined_rooms['TestUser'] == [1, 3]
+    
+    # New rooms keep getting ids past the imported ones
+    client.post('/api/rooms/create', data={'roomName': 'After Import', 'username': 'TestUser'})
+    assert main.chat_rooms[-1]['id'] == 5
+    
+    # Imported data was persisted
+    with open(main.ROOMS_FILE, 'r') as f:
+        assert len(json.load(f)) == 5
+    with open(main.JOINED_ROOMS_FILE, 'r') as f:
+        assert json.load(f)['Alice'] == [4]
+
+def test_import_skips_invalid_lines(client):
+    """Test that malformed records are skipped without aborting the import."""
+    lines = [
+        '{"type": "room", "id": 1, "na',
+        json.dumps({'type': 'room', 'id': 1}),
+        json.dumps({'type': 'unknown'}),
+        json.dumps({'type': 'membership', 'username': 'Alice', 'roomId': 42}),
+        json.dumps({'type': 'room', 'id': 1, 'name': 'Valid Room'})
+    ]
+    response = client.post('/api/import', data='\n'.join(lines), content_type='application/x-ndjson')
+    assert import_counts(response.get_json()) == {'rooms': 1, 'memberships': 0, 'skipped': 4}
+    assert 'Alice' not in main.joined_rooms
+
+def test_import_duplicate_room_ids(client):
+    """Test that a repeated room id is skipped rather than reported as imported."""
+    lines = [
+        json.dumps({'type': 'room', 'id': 1, 'name': 'First'}),
+        json.dumps({'type': 'room', 'id': 1, 'name': 'Second'}),
+        json.dumps({'type': 'membership', 'username': 'Alice', 'roomId': 1})
+    ]
+    response = client.post('/api/import', data='\n'.join(lines), content_type='application/x-ndjson')
+    assert import_counts(response.get_json()) == {'rooms': 1, 'memberships': 1, 'skipped': 1}
+    assert [room['name'] for room in main.chat_rooms] == ['Test Room 1', 'Test Room 2', 'First']
+    assert main.joined_rooms['Alice'] == [3]
+
+def test_import_invalid_utf8(client):
+    """Test that lines that are not valid UTF-8 are skipped and the rest is saved."""
+    body = b'\xff\xfe\n' + json.dumps({'type': 'room', 'id': 1, 'name': 'Valid Room'}).encode('utf-8')
+    response = client.post('/api/import', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert import_counts(response.get_json()) == {'rooms': 1, 'memberships': 0, 'skipped': 1}
+    
+    with open(main.ROOMS_FILE, 'r') as f:
+        assert json.load(f)[-1]['name'] == 'Valid Room'
+
+def test_export_import_round_trip(client):
+    """Test that an export can be imported back as a copy of the data."""
+    exported = client.get('/api/export').get_data(as_text=True)
+    
+    response = client.post('/api/import', data=exported, content_type='application/x-ndjson')
+    assert import_counts(response.get_json()) == {'rooms': 2, 'memberships': 1, 'skipped': 0}
+    assert [room['name'] for room in main.chat_rooms] == ['Test Room 1', 'Test Room 2', 'Test Room 1', 'Test Room 2']
+    assert main.joined_rooms['TestUser'] == [1, 3]
+
+def test_import_batches_and_resumes(client):
+    """Test that an interrupted import resumes from its checkpoint without duplicating rooms."""
+    lines = [json.dumps({'type': 'room', 'id': i, 'name': f'Room {i}'}) + '\n' for i in range(1, 8)]
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        checkpoint_file = os.path.join(temp_dir, 'import.checkpoint')
+        
+        # Stop reading after five lines to simulate a crash mid-import
+        def interrupted():
+            for number, line in enumerate(lines, start=1):
+                if number > 5:
+                    raise KeyboardInterrupt
+                yield line
+        
+        with pytest.raises(KeyboardInterrupt):
+            main.import_records(interrupted(), batch_size=2, checkpoint_file=checkpoint_file)
+        
+        # Two full batches were saved and checkpointed, the fifth line was not
+        with open(checkpoint_file, 'r') as f:
+            assert json.load(f)['line'] == 4
+        with open(checkpoint_file + '.ids', 'r') as f:
+            assert read_ndjson(f.read()) == [[1, 3], [2, 4], [3, 5], [4, 6]]
+        with open(main.ROOMS_FILE, 'r') as f:
+            assert len(json.load(f)) == 6
+        
+        # Simulate a restart that reloads state from disk before resuming
+        main.chat_rooms = main.load_rooms()
+        main.next_id = max(room['id'] for room in main.chat_rooms) + 1
+        
+        summary = main.import_records(lines, batch_size=2, checkpoint_file=checkpoint_file)
+        assert import_counts(summary) == {'rooms': 3, 'memberships': 0, 'skipped': 0}
+        assert not os.path.exists(checkpoint_file)
+        assert not os.path.exists(checkpoint_file + '.ids')
+    
+    assert [room['id'] for room in main.chat_rooms] == [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    assert main.chat_rooms[-1]['name'] == 'Room 7'
+
+def test_resume_after_rooms_created_in_between(client):
+    """Test that rooms created while an import was interrupted are not overwritten or joined by mistake."""
+    lines = [
+        json.dumps({'type': 'room', 'id': 1, 'name': 'R1'}) + '\n',
+        json.dumps({'type': 'room', 'id': 2, 'name': 'R2'}) + '\n',
+        json.dumps({'type': 'membership', 'username': 'Alice', 'roomId': 2}) + '\n'
+    ]
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        checkpoint_file = os.path.join(temp_dir, 'import.checkpoint')
+        
+        def interrupted():
+            yield lines[0]
+            raise KeyboardInterrupt
+        
+        with pytest.raises(KeyboardInterrupt):
+            main.import_records(interrupted(), batch_size=1, checkpoint_file=checkpoint_file)
+        
+        # A user creates a room before the import is resumed
+        client.post('/api/rooms/create', data={'roomName': 'User Room', 'username': 'TestUser'})
+        user_room_id = main.chat_rooms[-1]['id']
+        
+        summary = main.import_records(lines, batch_size=1, checkpoint_file=checkpoint_file)
+        assert import_counts(summary) == {'rooms': 1, 'memberships': 1, 'skipped': 0}
+    
+    names = {room['id']: room['name'] for room in main.chat_rooms}
+    assert names[user_room_id] == 'User Room'
+    assert sorted(names.values()) == ['R1', 'R2', 'Test Room 1', 'Test Room 2', 'User Room']
+    
+    r2_id = next(room['id'] for room in main.chat_rooms if room['name'] == 'R2')
+    assert main.joined_rooms['Alice'] == [r2_id]
+
+def test_failed_save_does_not_advance_checkpoint(client, monkeypatch):
+    """Test that the checkpoint only moves past lines that were saved."""
+    lines = [json.dumps({'type': 'room', 'id': i, 'name': f'Room {i}'}) + '\n' for i in range(1, 5)]
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        checkpoint_file = os.path.join(temp_dir, 'import.checkpoint')
+        
+        # The first batch saves normally, the second fails
+        original_save_rooms = main.save_rooms
+        saves = []
+        
+        def failing_save_rooms(rooms):
+            saves.append(len(rooms))
+            return original_save_rooms(rooms) if len(saves) == 1 else False
+        
+        monkeypatch.setattr(main, 'save_rooms', failing_save_rooms)
+        with pytest.raises(OSError):
+            main.import_records(lines, batch_size=2, checkpoint_file=checkpoint_file)
+        
+        with open(checkpoint_file, 'r') as f:
+            assert json.load(f)['line'] == 2
+        with open(main.ROOMS_FILE, 'r') as f:
+            assert len(json.load(f)) == 4
+    
+    # The failed batch was rolled back in memory too
+    assert [room['name'] for room in main.chat_rooms] == ['Test Room 1', 'Test Room 2', 'Room 1', 'Room 2']
+    assert main.next_id == 5
+
+def test_import_endpoint_save_failure(client, monkeypatch):
+    """Test that the import endpoint reports a failed save."""
+    monkeypatch.setattr(main, 'save_joined_rooms', lambda joined: False)
+    response = client.post('/api/import', data=json.dumps({'type': 'room', 'id': 1, 'name': 'Room'}),
+                           content_type='application/x-ndjson')
+    assert response.status_code == 500
+    assert response.get_json()['error'] == 'Could not save imported data'
+    assert response.get_json()['line'] == 0
+    
+    # The rolled-back room must not reach disk with the next ordinary save
+    monkeypatch.undo()
+    client.post('/api/rooms/create', data={'roomName': 'After Failure', 'username': 'TestUser'})
+    with open(main.ROOMS_FILE, 'r') as f:
+        assert [room['name'] for room in json.load(f)] == ['Test Room 1', 'Test Room 2', 'After Failure']
+    with open(main.JOINED_ROOMS_FILE, 'r') as f:
+        assert json.load(f) == {'TestUser': [1]}
+
+def test_import_rejects_non_string_fields(client):
+    """Test that room and membership fields of the wrong type are skipped."""
+    lines = [
+        json.dumps({'type': 'room', 'id': 1, 'name': {'a': 1}}),
+        json.dumps({'type': 'room', 'id': 2, 'name': 'Room', 'owner': ['Alice']}),
+        json.dumps({'type': 'room', 'id': 3, 'name': 'Room', 'createdAt': 1700000000}),
+        json.dumps({'type': 'room', 'id': '4', 'name': 'Room'}),
+        json.dumps({'type': 'room', 'id': 5, 'name': ''}),
+        json.dumps({'type': 'membership', 'username': 7, 'roomId': 1}),
+        json.dumps(['room'])
+    ]
+    response = client.post('/api/import', data='\n'.join(lines), content_type='application/x-ndjson')
+    assert import_counts(response.get_json()) == {'rooms': 0, 'memberships': 0, 'skipped': 7}
+    assert len(main.chat_rooms) == 2
+
+def test_import_endpoint_resume(client, monkeypatch):
+    """Test that a failed HTTP import resumes with the same importId without duplicating rooms."""
+    lines = [json.dumps({'type': 'room', 'id': i, 'name': f'Room {i}'}) for i in range(1, 5)]
+    lines.append(json.dumps({'type': 'membership', 'username': 'Alice', 'roomId': 1}))
+    body = '\n'.join(lines)
+    
+    # The second batch fails to save
+    original_save_rooms = main.save_rooms
+    saves = []
+    
+    def failing_save_rooms(rooms):
+        saves.append(len(rooms))
+        return original_save_rooms(rooms) if len(saves) == 1 else False
+    
+    monkeypatch.setattr(main, 'save_rooms', failing_save_rooms)
+    response = client.post('/api/import?importId=seed-1&batchSize=2', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 500
+    assert response.get_json()['line'] == 2
+    assert response.get_json()['importId'] == 'seed-1'
+    monkeypatch.setattr(main, 'save_rooms', original_save_rooms)
+    
+    # Posting the same body again continues after line 2
+    response = client.post('/api/import?importId=seed-1&batchSize=2', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert import_counts(response.get_json()) == {'rooms': 2, 'memberships': 1, 'skipped': 0}
+    
+    assert [room['name'] for room in main.chat_rooms] == ['Test Room 1', 'Test Room 2', 'Room 1', 'Room 2', 'Room 3', 'Room 4']
+    assert main.joined_rooms['Alice'] == [3]
+    assert os.listdir(os.path.join(main.DATA_DIR, 'imports')) == []
+
+def test_import_endpoint_rejects_different_input(client, monkeypatch):
+    """Test that a checkpoint is not applied to a different body posted under the same importId."""
+    lines = [json.dumps({'type': 'room', 'id': i, 'name': f'Room {i}'}) for i in range(1, 4)]
+    
+    monkeypatch.setattr(main, 'save_joined_rooms', lambda joined: len(main.chat_rooms) < 5)
+    response = client.post('/api/import?importId=seed-2&batchSize=2', data='\n'.join(lines),
+                           content_type='application/x-ndjson')
+    assert response.status_code == 500
+    monkeypatch.undo()
+    
+    other = [json.dumps({'type': 'room', 'id': i, 'name': f'Other {i}'}) for i in range(1, 4)]
+    response = client.post('/api/import?importId=seed-2', data='\n'.join(other), content_type='application/x-ndjson')
+    assert response.status_code == 409
+    assert b'does not match its checkpoint' in response.data
+    
+    # resume=false discards the checkpoint and imports the new body from the start
+    response = client.post('/api/import?importId=seed-2&resume=false', data='\n'.join(other),
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert import_counts(response.get_json()) == {'rooms': 3, 'memberships': 0, 'skipped': 0}
+
+def test_import_endpoint_invalid_import_id(client):
+    """Test that import ids are limited to safe file name characters."""
+    response = client.post('/api/import?importId=../rooms', data='', content_type='application/x-ndjson')
+    assert response.status_code == 400
+
+def test_concurrent_saves(client):
+    """Test that saves from several threads never write into each other's temporary file."""
+    results = []
+    
+    def save_many():
+        for _ in range(50):
+            results.append(main.save_rooms(main.chat_rooms))
+    
+    threads = [threading.Thread(target=save_many) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == [True] * 100
+    assert not any(name.endswith('.tmp') for name in os.listdir(main.DATA_DIR))
+
+def test_cli_export_import(client):
+    """Test the export-data and import-data commands."""
+    runner = main.app.test_cli_runner()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        export_file = os.path.join(temp_dir, 'export.ndjson')
+        result = runner.invoke(args=['export-data', export_file])
+        assert result.exit_code == 0
+        
+        with open(export_file, 'r') as f:
+            assert len(read_ndjson(f.read())) == 3
+        
+        result = runner.invoke(args=['import-data', export_file, '--batch-size', '1'])
+        assert result.exit_code == 0
+        assert 'Imported 2 rooms and 1 memberships, skipped 0 lines' in result.output
+        assert not os.path.exists(export_file + '.checkpoint')
+    
+    assert len(main.chat_rooms) == 4
@@ -0,0 +1,156 @@
+import gzip
+import json
+import os
+import sys
+import shutil
+import tempfile
+import pytest
+
+# Add the parent directory to the path so we can import main.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main
+
+@pytest.fixture
+def built_assets(client, monkeypatch):
+    # Build into a temporary dist directory so the repo stays untouched
+    with tempfile.TemporaryDirectory() as temp_dir:
+        monkeypatch.setattr(main, 'DIST_DIR', os.path.join(temp_dir, 'dist'))
+        yield main.build_static_assets()
+
+def test_build_static_assets(built_assets):
+    """Test that assets are fingerprinted, precompressed and referenced from index.html."""
+    assert set(built_assets) == set(main.FINGERPRINTED_ASSETS)
+    
+    for asset, hashed in built_assets.items():
+        # Hashed name keeps the directory and extension of the original
+        assert hashed != asset
+        assert os.path.dirname(hashed) == os.path.dirname(asset)
+        assert os.path.splitext(hashed)[1] == os.path.splitext(asset)[1]
+        
+        built_file = os.path.join(main.DIST_DIR, hashed)
+        with open(built_file, 'rb') as f:
+            data = f.read()
+        with open(built_file + '.gz', 'rb') as f:
+            assert gzip.decompress(f.read()) == data
+    
+    with open(os.path.join(main.DIST_DIR, 'index.html'), 'r') as f:
+        html = f.read()
+    for asset, hashed in built_assets.items():
+        assert f'"{main.ASSETS_URL_PATH}/{hashed}"' in html
+        assert f'"{asset}"' not in html
+        assert f'"./{asset}"' not in html
+    
+    with open(os.path.join(main.DIST_DIR, 'manifest.json'), 'r') as f:
+        assert json.load(f) == {'assets': built_assets, 'previous': []}
+
+def test_index_without_build(client, monkeypatch):
+    """Test that the unbuilt index.html is served when no build exists."""
+    monkeypatch.setattr(main, 'DIST_DIR', os.path.join(main.DATA_DIR, 'missing-dist'))
+    response = client.get('/')
+    assert response.status_code == 200
+    assert b'js/app.js' in response.data
+
+def test_index_after_build(client, built_assets):
+    """Test that the built index.html is served and must be revalidated."""
+    response = client.get('/')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert built_assets['js/app.js'].encode() in response.data
+    
+    # A repeat visit with the ETag costs a 304 and no body
+    response = client.get('/', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+def test_asset_gzip(client, built_assets):
+    """Test that the gzip variant is chosen when the client accepts it."""
+    hashed = built_assets['css/styles.css']
+    response = client.get(f'/assets/{hashed}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert 'immutable' in response.headers['Cache-Control']
+    assert f'max-age={main.IMMUTABLE_MAX_AGE}' in response.headers['Cache-Control']
+    
+    with open(os.path.join(main.app.static_folder, 'css/styles.css'), 'rb') as f:
+        assert gzip.decompress(response.data) == f.read()
+
+def test_asset_brotli(client, built_assets):
+    """Test that the brotli variant is preferred when the client accepts it."""
+    brotli = pytest.importorskip('brotli')
+    hashed = built_assets['js/app.js']
+    response = client.get(f'/assets/{hashed}', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'br'
+    
+    with open(os.path.join(main.app.static_folder, 'js/app.js'), 'rb') as f:
+        assert brotli.decompress(response.data) == f.read()
+
+def test_asset_identity(client, built_assets):
+    """Test that uncompressed bytes are sent when no encoding is accepted."""
+    hashed = built_assets['img/favicon.svg']
+    response = client.get(f'/assets/{hashed}', headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.mimetype == 'image/svg+xml'
+    assert 'immutable' in response.headers['Cache-Control']
+
+def test_asset_not_found(client, built_assets):
+    """Test requesting an asset that was not built."""
+    response = client.get('/assets/js/app.0000.js')
+    assert response.status_code == 404
+
+def test_asset_route_only_serves_fingerprinted_files(client, built_assets):
+    """Test that unhashed build outputs are not served with immutable caching."""
+    for filename in ['index.html', 'index.html.gz', 'manifest.json', 'js/app.js']:
+        response = client.get(f'/assets/{filename}')
+        assert response.status_code == 404
+        assert 'immutable' not in response.headers.get('Cache-Control', '')
+    
+    # Compressed variants are chosen by the server, never requested by name
+    response = client.get(f"/assets/{built_assets['js/app.js']}.gz")
+    assert response.status_code == 404
+
+def test_rebuild_keeps_previous_hashes(client, built_assets, monkeypatch):
+    """Test that a rebuild swaps in a new build and keeps the previous hashed files until the next one."""
+    # Build from a copy of the static folder so app.js can be changed
+    static_copy = os.path.join(os.path.dirname(main.DIST_DIR), 'static')
+    shutil.copytree(main.app.static_folder, static_copy)
+    monkeypatch.setattr(main.app, 'static_folder', static_copy)
+    
+    def change_app_js(comment):
+        with open(os.path.join(static_copy, 'js/app.js'), 'a') as f:
+            f.write(f'\n// {comment}\n')
+        return main.build_static_assets()
+    
+    first_js = built_assets['js/app.js']
+    second = change_app_js('second build')
+    assert second['js/app.js'] != first_js
+    assert second['css/styles.css'] == built_assets['css/styles.css']
+    
+    # The page served before the rebuild can still load its script
+    response = client.get(f'/assets/{first_js}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert client.get(f"/assets/{second['js/app.js']}").status_code == 200
+    assert second['js/app.js'].encode() in client.get('/').data
+    
+    # DIST_DIR points at a single build directory; older builds are removed
+    assert os.path.islink(main.DIST_DIR)
+    assert len(os.listdir(main.DIST_DIR + '-builds')) == 1
+    
+    # Two builds later the first hash is gone
+    third = change_app_js('third build')
+    assert client.get(f'/assets/{first_js}').status_code == 404
+    assert client.get(f"/assets/{second['js/app.js']}").status_code == 200
+    assert client.get(f"/assets/{third['js/app.js']}").status_code == 200
+
+def test_build_replaces_plain_dist_directory(client, monkeypatch):
+    """Test that a dist directory left by an older build is replaced by the build symlink."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        monkeypatch.setattr(main, 'DIST_DIR', os.path.join(temp_dir, 'dist'))
+        os.makedirs(os.path.join(main.DIST_DIR, 'js'))
+        
+        manifest = main.build_static_assets()
+        assert os.path.islink(main.DIST_DIR)
+        assert client.get(f"/assets/{manifest['js/app.js']}").status_code == 200
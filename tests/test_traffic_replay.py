@@ -0,0 +1,188 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import pytest
+from werkzeug.serving import make_server
+
+# Add the parent directory to the path so we can import main.py and replay.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main
+import replay
+
+@pytest.fixture
+def capture_file(client, monkeypatch):
+    # Enable capture into a temporary trace file for the duration of the test
+    with tempfile.TemporaryDirectory() as temp_dir:
+        trace_file = os.path.join(temp_dir, 'trace.ndjson')
+        monkeypatch.setitem(main.app.config, 'TRAFFIC_CAPTURE_FILE', trace_file)
+        yield trace_file
+
+def test_capture_disabled(client, capture_file, monkeypatch):
+    """Test that nothing is captured unless a capture file is configured."""
+    monkeypatch.setitem(main.app.config, 'TRAFFIC_CAPTURE_FILE', None)
+    response = client.get('/api/rooms?username=TestUser')
+    assert response.status_code == 200
+    assert not os.path.exists(capture_file)
+
+def test_capture_timestamp_is_arrival_time(client, capture_file, monkeypatch):
+    """Test that the recorded timestamp is taken when the request arrives, not when it finishes."""
+    original_render = main.render_template_string
+    
+    def slow_render(*args, **kwargs):
+        time.sleep(0.2)
+        return original_render(*args, **kwargs)
+    
+    monkeypatch.setattr(main, 'render_template_string', slow_render)
+    before = time.time()
+    client.get('/api/rooms?username=TestUser')
+    
+    record = next(replay.load_trace(capture_file))
+    assert record['ts'] - before < 0.1
+    assert record['ms'] >= 200
+
+def test_capture_requests(client, capture_file):
+    """Test that method, path, args, form fields and timing are recorded."""
+    client.get('/api/rooms?username=TestUser')
+    client.post('/api/rooms/create', data={'roomName': 'Captured Room', 'username': 'TestUser'})
+    client.get('/api/rooms/1/join?username=Other')
+    
+    records = list(replay.load_trace(capture_file))
+    assert len(records) == 3
+    
+    assert records[0]['method'] == 'GET'
+    assert records[0]['path'] == '/api/rooms'
+    assert records[0]['route'] == '/api/rooms'
+    assert records[0]['args'] == [['username', 'TestUser']]
+    assert records[0]['status'] == 200
+    assert records[0]['ms'] >= 0
+    
+    assert records[1]['method'] == 'POST'
+    assert ['roomName', 'Captured Room'] in records[1]['form']
+    
+    assert records[2]['route'] == '/api/rooms/<int:room_id>/join'
+    assert records[0]['ts'] <= records[1]['ts'] <= records[2]['ts']
+
+def test_load_trace_skips_malformed_lines():
+    """Test that a truncated trailing line does not abort loading."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        trace_file = os.path.join(temp_dir, 'trace.ndjson')
+        with open(trace_file, 'w') as f:
+            f.write(json.dumps({'ts': 1, 'method': 'GET', 'path': '/api/rooms'}) + '\n\n{"ts": 2, "met')
+        
+        records = list(replay.load_trace(trace_file))
+        assert len(records) == 1
+
+def test_replay_report(client):
+    """Test replaying records and reporting latency and errors per route."""
+    records = [
+        {'ts': 100.0, 'method': 'GET', 'path': '/api/rooms', 'route': '/api/rooms', 'args': [['username', 'TestUser']], 'form': []},
+        {'ts': 100.1, 'method': 'GET', 'path': '/api/rooms/1/join', 'route': '/api/rooms/<int:room_id>/join', 'args': [['username', 'A']], 'form': []},
+        {'ts': 100.2, 'method': 'GET', 'path': '/api/rooms/2/join', 'route': '/api/rooms/<int:room_id>/join', 'args': [['username', 'A']], 'form': []},
+        {'ts': 100.3, 'method': 'GET', 'path': '/api/rooms', 'route': '/api/rooms', 'args': [['username', 'TestUser']], 'form': []}
+    ]
+    
+    def send(record):
+        if record['path'].endswith('/2/join'):
+            raise ConnectionError('connection reset')
+        # Replay runs in worker threads, so each request gets its own test client
+        return main.app.test_client().open(record['path'], method=record['method'], query_string=record['args']).status_code
+    
+    report = replay.replay(records, send, speed=0, concurrency=1)
+    
+    assert report['GET /api/rooms']['count'] == 2
+    assert report['GET /api/rooms']['errors'] == 0
+    assert report['GET /api/rooms/<int:room_id>/join']['count'] == 2
+    assert report['GET /api/rooms/<int:room_id>/join']['errors'] == 1
+    assert report['GET /api/rooms']['p95_ms'] <= report['GET /api/rooms']['max_ms']
+    assert report['GET /api/rooms']['max_lag_ms'] >= 0
+    
+    # The join went through the app, so the membership was persisted
+    assert 1 in main.joined_rooms['A']
+
+def test_replay_latency_includes_queue_time():
+    """Test that time spent waiting for a free worker is counted as latency and lag."""
+    records = [{'ts': 0, 'method': 'GET', 'path': '/slow', 'route': '/slow'} for _ in range(3)]
+    
+    def send(record):
+        time.sleep(0.1)
+        return 200
+    
+    # Three simultaneous requests through one worker: the last one waits for the first two
+    report = replay.replay(records, send, speed=1, concurrency=1)
+    stats = report['GET /slow']
+    assert stats['count'] == 3
+    assert stats['max_ms'] >= 300
+    assert stats['max_lag_ms'] >= 200
+    assert stats['max_ms'] - stats['max_lag_ms'] < 200
+
+def test_replay_over_http(client, capture_file, monkeypatch):
+    """Test replaying a captured trace against a live server."""
+    client.get('/api/rooms?username=TestUser')
+    client.post('/api/rooms/create', data={'roomName': 'Replayed Room', 'username': 'TestUser'})
+    client.put('/api/rooms/3/edit?username=TestUser', data={'roomName': 'Edited'})
+    client.put('/api/rooms/999/edit?username=TestUser', data={'roomName': 'Missing'})
+    monkeypatch.setitem(main.app.config, 'TRAFFIC_CAPTURE_FILE', None)
+    
+    # Make the target's data differ from the captured server's: the replayed create gets id 4,
+    # so the replayed edit of room 3 now returns 404 where the capture saw 200
+    client.delete('/api/rooms/3/delete?username=TestUser')
+    
+    server = make_server('127.0.0.1', 0, main.app)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        send = replay.http_sender(f'http://127.0.0.1:{server.server_port}')
+        report = replay.replay(replay.load_trace(capture_file), send, speed=100, concurrency=2)
+    finally:
+        server.shutdown()
+        thread.join()
+    
+    assert report['POST /api/rooms/create']['count'] == 1
+    assert report['POST /api/rooms/create']['mismatches'] == 0
+    
+    # Both edits got 404s, which are not server errors, but only one differs from the capture
+    edits = report['PUT /api/rooms/<int:room_id>/edit']
+    assert edits['count'] == 2
+    assert edits['errors'] == 0
+    assert edits['mismatches'] == 1
+    assert [room['name'] for room in main.chat_rooms if room['name'] in ('Replayed Room', 'Edited')] == ['Replayed Room']
+
+def test_print_report_flags_mismatches(capsys):
+    """Test that the printed report shows status mismatches."""
+    records = [
+        {'ts': 0, 'method': 'GET', 'path': '/api/rooms/5/join', 'route': '/api/rooms/<int:room_id>/join', 'status': 200},
+        {'ts': 0, 'method': 'GET', 'path': '/api/rooms', 'route': '/api/rooms', 'status': 200}
+    ]
+    report = replay.replay(records, lambda record: 404 if 'join' in record['path'] else 200, speed=0, concurrency=1)
+    replay.print_report(report)
+    
+    output = capsys.readouterr().out
+    assert 'mismatch' in output
+    assert '1 responses had a different status than when captured' in output
+
+def test_replay_bounds_in_flight_requests():
+    """Test that the trace is read only as fast as workers free up, even at full speed."""
+    counts = {'read': 0, 'done': 0, 'max_ahead': 0}
+    lock = threading.Lock()
+    
+    def records():
+        for _ in range(20):
+            with lock:
+                counts['read'] += 1
+                counts['max_ahead'] = max(counts['max_ahead'], counts['read'] - counts['done'])
+            yield {'ts': 0, 'method': 'GET', 'path': '/slow', 'route': '/slow'}
+    
+    def send(record):
+        time.sleep(0.01)
+        with lock:
+            counts['done'] += 1
+        return 200
+    
+    report = replay.replay(records(), send, speed=0, concurrency=2)
+    assert report['GET /slow']['count'] == 20
+    
+    # At most the two in-flight requests plus the one waiting for a slot have been read ahead
+    assert counts['max_ahead'] <= 3